@@ -1,26 +1,88 @@
 import os
 import shutil
+import stat
 import sys
-import argparse
-from datetime import datetime
+import atexit
+import errno
+import time
+import types
+
+COPY_BUFSIZE = 128 * 1024  # Chunk size used when copying files through userspace
+# Errors meaning a kernel copy call does not support the given files, so a slower method should be tried
+KERNEL_COPY_UNSUPPORTED = frozenset((errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSOCK))
+LOG_BUFSIZE = 64 * 1024  # Log entries are buffered up to this size before being written
+BASE_PREFIX = os.path.realpath('/Users/harrisonryan') + os.sep  # Browsing is restricted to this directory
+MODES = frozenset(('basic', 'elevated', 'admin'))  # Valid values for the -m flag
+USAGE = "usage: {prog} [-h] -m {{basic,elevated,admin}} [-d D]"  # Formatted with the program name
+HELP = """
+File Manager Script
+
+options:
+  -h, --help            show this help message and exit
+  -m {basic,elevated,admin}
+                        Mode of operation: basic, elevated, or admin.
+  -d D                  Directory path to start browsing. Optional; if not
+                        provided, defaults to the current working directory."""
 
 # Simulate command-line arguments for Spyder IDE
 # This block is only for development in Spyder to simulate command-line input
 if 'spyder' in sys.modules:
     sys.argv = ['file_manager.py', '-m', 'basic', '-d', '/Users/harrisonryan/Downloads']
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """
-    Parse command-line arguments using argparse.
+    Parse command-line arguments.
+
+    The script only accepts two flags, so they are parsed directly instead of
+    constructing an argparse parser on every start.
+
+    Args:
+        argv (list): Arguments to parse. Defaults to sys.argv[1:].
 
     Returns:
-        argparse.Namespace: Parsed command-line arguments.
+        types.SimpleNamespace: Parsed arguments with attributes `m` and `d`.
     """
-    parser = argparse.ArgumentParser(description='File Manager Script')
-    parser.add_argument('-m', required=True, choices=['basic', 'elevated', 'admin'], 
-                        help='Mode of operation: basic, elevated, or admin.')
-    parser.add_argument('-d', help='Directory path to start browsing. Optional; if not provided, defaults to the current working directory.')
-    return parser.parse_args()
+    args = types.SimpleNamespace(m=None, d=None)
+    argv = sys.argv[1:] if argv is None else argv
+    unrecognized = []  # Unknown arguments are reported after the required ones are checked
+    i = 0
+    while i < len(argv):
+        flag = argv[i]
+        if flag in ('-h', '--help'):  # Show usage and exit
+            print(USAGE.format(prog=os.path.basename(sys.argv[0])))
+            print(HELP)
+            sys.exit(0)
+        if flag[:2] not in ('-m', '-d'):  # Set aside unknown flags
+            unrecognized.append(flag)
+            i += 1
+            continue
+        if len(flag) > 2:  # The value is attached, as in -madmin or -m=admin
+            value = flag[2:].removeprefix('=')
+            i += 1
+        elif i + 1 < len(argv) and not (argv[i + 1].startswith('-') and len(argv[i + 1]) > 1):
+            value = argv[i + 1]  # The value is the next argument
+            i += 2
+        else:  # Every flag takes a value
+            usage_error(f"argument {flag}: expected one argument")
+        if flag[1] == 'm' and value not in MODES:  # The mode must be one of the known modes
+            usage_error(f"argument -m: invalid choice: '{value}' (choose from 'basic', 'elevated', 'admin')")
+        setattr(args, flag[1], value)  # Store the value under the flag's letter
+    if args.m is None:  # The mode is required
+        usage_error("the following arguments are required: -m")
+    if unrecognized:  # Reject unknown flags
+        usage_error(f"unrecognized arguments: {' '.join(unrecognized)}")
+    return args
+
+def usage_error(message):
+    """
+    Print a usage error to stderr and exit with status 2.
+
+    Args:
+        message (str): Description of the problem with the arguments.
+    """
+    prog = os.path.basename(sys.argv[0])  # Name the program the way argparse does
+    sys.stderr.write(f"{USAGE.format(prog=prog)}\n{prog}: error: {message}\n")
+    sys.exit(2)
 
 def setup_logging():
     """
@@ -32,42 +94,66 @@ def setup_logging():
     """
     home_dir = os.path.expanduser('~')  # Get the path to the user's home directory
     log_dir = os.path.join(home_dir, 'Python_Log')  # Define the log directory path
-    if not os.path.exists(log_dir):  # Check if the directory does not exist
-        os.makedirs(log_dir)  # Create the directory if it does not exist
+    os.makedirs(log_dir, exist_ok=True)  # Create the directory if it does not exist
     log_file = os.path.join(log_dir, 'system_log.txt')  # Define the path for the log file
     return log_file
 
-def log_action(action, log_file):
+_log_stamp = (None, '')  # The last whole second logged and its formatted date and time
+
+def log_action(action, log_fh):
     """
-    Log an action to the specified log file.
+    Log an action to the open log file.
 
     Args:
         action (str): Description of the action to log.
-        log_file (str): Path to the log file.
+        log_fh (file): Handle to the log file, opened in binary append mode.
+    """
+    global _log_stamp
+    seconds, nanoseconds = divmod(time.time_ns(), 1_000_000_000)  # Split the current time into whole and fractional seconds
+    if seconds != _log_stamp[0]:  # Format the date and time at most once per second
+        _log_stamp = (seconds, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(seconds)))
+    log_fh.write(f"{_log_stamp[1]}.{nanoseconds // 1000:06d}: {action}\n".encode())  # Buffer the action with a timestamp
+
+def prompt(message):
+    """
+    Prompt the user and read one line from standard input.
+
+    Args:
+        message (str): The prompt to display.
+
+    Returns:
+        str: The line entered by the user, without the trailing newline.
+
+    Raises:
+        EOFError: If standard input is exhausted, matching input().
     """
-    with open(log_file, 'a') as f:  # Open the log file in append mode
-        f.write(f"{datetime.now()}: {action}\n")  # Write the action with a timestamp
+    sys.stdout.write(message)  # Display the prompt
+    sys.stdout.flush()  # Make sure the prompt is visible before reading
+    line = sys.stdin.readline()  # Read the user's response
+    if not line:  # An empty read means end of input
+        raise EOFError
+    return line.rstrip('\n')
 
-def list_directory(path):
+def list_directory(path, output):
     """
     List files and directories in the specified path.
 
     Args:
         path (str): The directory path to list contents from.
+        output (list): Lines of output for the caller to write.
     """
     try:
-        entries = os.listdir(path)  # List all entries in the directory
-        for entry in entries:
-            entry_path = os.path.join(path, entry)  # Get the full path of the entry
-            if os.path.isdir(entry_path):  # Check if it is a directory
-                print(f"{entry}/")  # Print the directory name with a trailing slash
-            else:
-                size = os.path.getsize(entry_path)  # Get the size of the file
-                print(f"{entry} - {size} bytes")  # Print the file name and size
+        with os.scandir(path) as it:  # Iterate directory entries with cached type information
+            for entry in it:
+                if entry.is_dir():  # Check if it is a directory; only symlinks need an extra stat
+                    output.append(f"{entry.name}/\n")  # Add the directory name with a trailing slash
+                    continue  # Directories are listed without a size, so skip the stat
+                size = entry.stat().st_size  # Get the size of the file, following symlinks
+                output.append(f"{entry.name} - {size} bytes\n")  # Add the file name and size
     except Exception as e:
-        print(f"Error listing directory: {e}")  # Print an error message if listing fails
+        output.append(f"Error listing directory: {e}\n")  # Report an error message if listing fails
 
-def change_directory(current_path):
+def change_directory(current_path, output):
     """
     Change the current directory to a new path.
 
@@ -75,73 +161,218 @@ def change_directory(current_path):
     
     Args:
         current_path (str): The current directory path.
+        output (list): Lines of output for the caller to write.
 
     Returns:
         str: The updated directory path if valid, otherwise the original path.
     """
-    new_path = input("Enter the new directory path: ")  # Prompt user for a new directory path
+    new_path = prompt("Enter the new directory path: ")  # Prompt user for a new directory path
     if not os.path.isdir(new_path):  # Check if the new path is a valid directory
-        print("Invalid directory.")  # Print an error message if invalid
+        output.append("Invalid directory.\n")  # Report an error message if invalid
     else:
         current_path = new_path  # Update the current path to the new path
     return current_path
 
-def copy_item(source, destination):
+def fast_copy(source, destination):
+    """
+    Copy a single file inside the kernel where available.
+
+    Tries copy_file_range, then sendfile, and falls back to a buffered copy with a
+    128 KiB chunk size if neither is supported.
+    Behaves like shutil.copy: a directory destination receives a file of the same name,
+    the permission bits are copied, and copying a file onto itself raises SameFileError.
+
+    Args:
+        source (str): The path to the source file.
+        destination (str): The path to the destination file or directory.
+
+    Returns:
+        str: The path of the file that was written.
+    """
+    if os.path.isdir(destination):  # Copy into the directory if one is given
+        destination = os.path.join(destination, os.path.basename(source))
+    if os.path.exists(destination) and os.path.samefile(source, destination):  # Opening the destination would truncate the source
+        raise shutil.SameFileError(f"{source!r} and {destination!r} are the same file")
+    _copy_file(source, destination)  # Copy the file contents
+    shutil.copymode(source, destination)  # Copy the permission bits like shutil.copy
+    return destination
+
+def _kernel_copy(copy_chunk, blocksize):
+    """
+    Call a kernel copy primitive repeatedly until it reports end of file.
+
+    Only used for files with a non-zero size, so copying nothing at all means the
+    call silently does not support the file.
+
+    Args:
+        copy_chunk (callable): Called as copy_chunk(offset, count); returns the number of bytes copied.
+        blocksize (int): The number of bytes to request per call.
+
+    Raises:
+        OSError: With errno EINVAL if the first call copies nothing.
+    """
+    offset = 0
+    while True:
+        copied = copy_chunk(offset, blocksize)  # The kernel may copy fewer bytes than requested
+        if copied == 0:
+            if offset == 0:  # Some filesystems report success without copying anything
+                raise OSError(errno.EINVAL, "kernel copy returned no data for a non-empty file")
+            break  # Stop at end of file, even if the file grew while copying
+        offset += copied
+
+def _copy_file(source, destination):
+    """
+    Copy a file's contents to an exact destination path.
+
+    Args:
+        source (str): The path to the source file.
+        destination (str): The path of the file to write.
+    """
+    with open(source, 'rb') as fsrc, open(destination, 'wb') as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(src_fd).st_size  # Get the number of bytes to transfer
+        blocksize = max(size, COPY_BUFSIZE)  # Request the whole file per call where possible
+        kernel_copies = (
+            # Copy inside the kernel, reflinking on filesystems that support it (Linux 4.5+)
+            lambda offset, count: os.copy_file_range(src_fd, dst_fd, count, offset, offset),
+            # Copy inside the kernel through the page cache
+            lambda offset, count: os.sendfile(dst_fd, src_fd, offset, count),
+        )
+        # Files such as those in /proc report a size of 0 but have content, so copy them through userspace
+        for copy_chunk in (kernel_copies if size else ()):
+            try:
+                _kernel_copy(copy_chunk, blocksize)
+                break
+            except AttributeError:  # The call is not available on this platform
+                pass
+            except OSError as e:
+                if e.errno not in KERNEL_COPY_UNSUPPORTED:  # Real failures such as a full disk are reported
+                    raise
+                fdst.seek(0)  # Discard any partially written data
+                fdst.truncate()
+        else:
+            shutil.copyfileobj(fsrc, fdst, COPY_BUFSIZE)  # Copy in large userspace chunks
+
+def fast_copytree(source, destination):
+    """
+    Recursively copy a directory tree using os.scandir.
+
+    Reuses the type information returned while reading each directory instead of
+    issuing a separate stat per entry. Like shutil.copytree, symbolic links are
+    followed, file and directory metadata is preserved, and special files such as
+    named pipes raise SpecialFileError.
+
+    Args:
+        source (str): The path to the source directory.
+        destination (str): The path to the new destination directory; it must not exist.
+    """
+    os.makedirs(destination)  # Create the destination directory
+    with os.scandir(source) as it:
+        for entry in it:
+            target = os.path.join(destination, entry.name)  # Path of the copy
+            if entry.is_dir():  # Recurse into subdirectories
+                fast_copytree(entry.path, target)
+            elif entry.is_file():  # Copy a regular file; target is known not to be a directory
+                _copy_file(entry.path, target)
+                shutil.copystat(entry.path, target)  # Preserve the file's mode and timestamps like shutil.copy2
+            else:  # Opening a pipe or device would block or read forever
+                raise shutil.SpecialFileError(f"`{entry.path}` is not a regular file or directory")
+    shutil.copystat(source, destination)  # Preserve the directory's metadata
+
+def copy_item(source, destination, output):
     """
     Copy a file or directory from source to destination.
 
     Args:
         source (str): The path to the source file or directory.
         destination (str): The path to the destination location.
+        output (list): Lines of output for the caller to write.
+
+    Returns:
+        bool: True if the item was copied, otherwise False.
     """
     try:
         if os.path.isdir(source):  # Check if the source is a directory
-            shutil.copytree(source, destination)  # Copy the directory and its contents
-            print(f"{os.path.basename(source)} was copied to {destination}")  # Notify user of the copy operation
+            fast_copytree(source, destination)  # Copy the directory and its contents
+            output.append(f"{os.path.basename(source)} was copied to {destination}\n")  # Notify user of the copy operation
+        else:
+            fast_copy(source, destination)  # Copy a single file
+            output.append(f"{os.path.basename(source)} was copied to {destination}\n")  # Notify user of the copy operation
+        return True
+    except FileNotFoundError as e:
+        if e.filename == source:  # The source itself is missing
+            output.append("Source does not exist.\n")  # Report error message for non-existent source
         else:
-            shutil.copy(source, destination)  # Copy a single file
-            print(f"{os.path.basename(source)} was copied to {destination}")  # Notify user of the copy operation
+            output.append(f"Error copying item: {e}\n")  # Report an error message if copy fails
     except Exception as e:
-        print(f"Error copying item: {e}")  # Print an error message if copy fails
+        output.append(f"Error copying item: {e}\n")  # Report an error message if copy fails
+    return False
 
-def move_item(source, destination):
+def move_item(source, destination, output):
     """
     Move a file or directory from source to destination.
 
     Args:
         source (str): The path to the source file or directory.
         destination (str): The path to the destination location.
+        output (list): Lines of output for the caller to write.
+
+    Returns:
+        bool: True if the item was moved, otherwise False.
     """
     try:
         shutil.move(source, destination)  # Move the file or directory to the new location
-        print(f"{os.path.basename(source)} was moved to {destination}")  # Notify user of the move operation
+        output.append(f"{os.path.basename(source)} was moved to {destination}\n")  # Notify user of the move operation
+        return True
+    except FileNotFoundError as e:
+        if e.filename == source:  # The source itself is missing
+            output.append("Source does not exist.\n")  # Report error message for non-existent source
+        else:
+            output.append(f"Error moving item: {e}\n")  # Report an error message if move fails
     except Exception as e:
-        print(f"Error moving item: {e}")  # Print an error message if move fails
+        output.append(f"Error moving item: {e}\n")  # Report an error message if move fails
+    return False
 
-def delete_item(item_path, backup_dir):
+def delete_item(item_path, backup_dir, output):
     """
     Delete a file or directory after backing it up.
 
     Args:
         item_path (str): The path to the file or directory to delete.
         backup_dir (str): The path to the backup directory where deleted items will be copied.
+        output (list): Lines of output for the caller to write.
+
+    Returns:
+        bool: True if the item was deleted, otherwise False.
     """
     try:
-        if not os.path.exists(backup_dir):  # Check if the backup directory exists
-            os.makedirs(backup_dir)  # Create the backup directory if it does not exist
+        os.makedirs(backup_dir, exist_ok=True)  # Create the backup directory if it does not exist
         item_name = os.path.basename(item_path)  # Get the base name of the item to delete
         backup_path = os.path.join(backup_dir, f"deleted_{item_name}")  # Define the backup path with 'deleted_' prefix
-        if os.path.isdir(item_path):  # Check if the item is a directory
-            shutil.copytree(item_path, backup_path)  # Copy the entire directory to backup
-        else:
-            shutil.copy(item_path, backup_path)  # Copy the file to backup
-        if os.path.isdir(item_path):  # If it is a directory, remove it
-            shutil.rmtree(item_path)  # Remove the directory and its contents
+        try:
+            os.rename(item_path, backup_path)  # Move the item into the backup directory in one step
+        except OSError as e:
+            if e.errno != errno.EXDEV:  # Only fall back when the backup is on another filesystem
+                raise
+            is_dir = stat.S_ISDIR(os.lstat(item_path).st_mode)  # Check once if the item is a directory
+            if is_dir:
+                fast_copytree(item_path, backup_path)  # Copy the entire directory to backup
+            else:
+                fast_copy(item_path, backup_path)  # Copy the file to backup
+            if is_dir:  # If it is a directory, remove it
+                shutil.rmtree(item_path)  # Remove the directory and its contents
+            else:
+                os.remove(item_path)  # Remove the file
+        output.append(f"{item_name} was deleted and backed up.\n")  # Notify user of the delete operation
+        return True
+    except FileNotFoundError as e:
+        if e.filename == item_path:  # The item itself is missing
+            output.append("Item does not exist.\n")  # Report error message for non-existent item
         else:
-            os.remove(item_path)  # Remove the file
-        print(f"{item_name} was deleted and backed up.")  # Notify user of the delete operation
+            output.append(f"Error deleting item: {e}\n")  # Report an error message if delete fails
     except Exception as e:
-        print(f"Error deleting item: {e}")  # Print an error message if delete fails
+        output.append(f"Error deleting item: {e}\n")  # Report an error message if delete fails
+    return False
 
 def main():
     """
@@ -152,58 +383,63 @@ def main():
     """
     args = parse_arguments()  # Parse command-line arguments
     log_file = setup_logging()  # Set up the log file
+    log_fh = open(log_file, 'ab', buffering=LOG_BUFSIZE)  # Open the log file once for the whole session
+    atexit.register(log_fh.close)  # Flush and close the log file when the program exits
     current_dir = args.d if args.d else '/Users/harrisonryan/Downloads'  # Set the current directory based on arguments or default
 
-    # Validate that the current directory path is absolute and does not contain '..'
-    if not os.path.isabs(current_dir) or '..' in os.path.relpath(current_dir, '/Users/harrisonryan'):
+    # Validate that the current directory path is absolute and resolves inside the base directory
+    real_dir = os.path.realpath(current_dir) + os.sep  # Resolve '..' and symlinks, then compare as a prefix
+    if not os.path.isabs(current_dir) or not real_dir.startswith(BASE_PREFIX):
         print("Invalid directory path.")  # Print error message for invalid path
         sys.exit(1)  # Exit the program with an error code
 
+    backup_dir = os.path.join(os.path.expanduser('~'), 'backups')  # Define backup directory path once
+    if args.m == 'admin':  # Only admin mode can delete items
+        os.makedirs(backup_dir, exist_ok=True)  # Create the backup directory if it does not exist
+
+    # Build the menu and the set of valid choices once, since the mode never changes
+    menu = ["\nMenu:\n", "1. List directory\n"]  # Basic functionality
+    allowed_choices = {'0', '1'}
+    if args.m in ['elevated', 'admin']:
+        menu.append("2. Copy item\n")  # Additional functionality for elevated and admin modes
+        allowed_choices.add('2')
+    if args.m == 'admin':
+        menu.append("3. Move item\n")  # Additional functionality for admin mode
+        menu.append("4. Delete item\n")  # Additional functionality for admin mode
+        allowed_choices.update(('3', '4'))
+    menu.append("0. Exit\n")  # Option to exit the program
+    menu = ''.join(menu)
+    allowed_choices = frozenset(allowed_choices)
+
+    output = []  # Messages produced by the current iteration
     while True:
-        # Display menu options based on the mode
-        print("\nMenu:")
-        print("1. List directory")  # Basic functionality
-        if args.m in ['elevated', 'admin']:
-            print("2. Copy item")  # Additional functionality for elevated and admin modes
-        if args.m == 'admin':
-            print("3. Move item")  # Additional functionality for admin mode
-            print("4. Delete item")  # Additional functionality for admin mode
-        print("0. Exit")  # Option to exit the program
-
-        choice = input("Select an option: ")  # Get user choice from menu
-
-        if choice == '0':
+        output.append(menu)  # Display menu options based on the mode
+        sys.stdout.write(''.join(output))  # Write the iteration's messages and the menu at once
+        output.clear()
+
+        choice = prompt("Select an option: ")  # Get user choice from menu
+
+        if choice not in allowed_choices:
+            output.append("Invalid choice.\n")  # Report error message for invalid menu choice
+        elif choice == '0':
+            log_fh.flush()  # Write any buffered log entries before exiting
             break  # Exit the loop and terminate the program
         elif choice == '1':
-            list_directory(current_dir)  # List contents of the current directory
-        elif choice == '2' and args.m in ['elevated', 'admin']:
-            source = input("Enter source path: ")  # Prompt user for source path
-            destination = input("Enter destination path: ")  # Prompt user for destination path
-            if os.path.exists(source):  # Check if the source exists
-                copy_item(source, destination)  # Perform copy operation
-                log_action(f"Copied {source} to {destination}", log_file)  # Log the action
-            else:
-                print("Source does not exist.")  # Print error message for non-existent source
-        elif choice == '3' and args.m == 'admin':
-            source = input("Enter source path: ")  # Prompt user for source path
-            destination = input("Enter destination path: ")  # Prompt user for destination path
-            if os.path.exists(source):  # Check if the source exists
-                move_item(source, destination)  # Perform move operation
-                log_action(f"Moved {source} to {destination}", log_file)  # Log the action
-            else:
-                print("Source does not exist.")  # Print error message for non-existent source
-        elif choice == '4' and args.m == 'admin':
-            item_path = input("Enter path of item to delete: ")  # Prompt user for the path of the item to delete
-            backup_dir = os.path.join(os.path.expanduser('~'), 'backups')  # Define backup directory path
-            if not os.path.exists(backup_dir):  # Check if the backup directory exists
-                os.makedirs(backup_dir)  # Create the backup directory if it does not exist
-            if os.path.exists(item_path):  # Check if the item to delete exists
-                delete_item(item_path, backup_dir)  # Perform delete operation
-                log_action(f"Deleted {item_path}", log_file)  # Log the action
-            else:
-                print("Item does not exist.")  # Print error message for non-existent item
-        else:
-            print("Invalid choice.")  # Print error message for invalid menu choice
+            list_directory(current_dir, output)  # List contents of the current directory
+        elif choice == '2':
+            source = prompt("Enter source path: ")  # Prompt user for source path
+            destination = prompt("Enter destination path: ")  # Prompt user for destination path
+            if copy_item(source, destination, output):  # Perform copy operation
+                log_action(f"Copied {source} to {destination}", log_fh)  # Log the action
+        elif choice == '3':
+            source = prompt("Enter source path: ")  # Prompt user for source path
+            destination = prompt("Enter destination path: ")  # Prompt user for destination path
+            if move_item(source, destination, output):  # Perform move operation
+                log_action(f"Moved {source} to {destination}", log_fh)  # Log the action
+        elif choice == '4':
+            item_path = prompt("Enter path of item to delete: ")  # Prompt user for the path of the item to delete
+            if delete_item(item_path, backup_dir, output):  # Perform delete operation
+                log_action(f"Deleted {item_path}", log_fh)  # Log the action
 
 if __name__ == "__main__":
     main()